@@ -59,7 +59,7 @@ class AccelConeDrawer(pymanoid.Process):
         if color is None:
             color = (0., 0.5, 0., 0.5)
         if type(color) is str:
-            color = matplotlib_to_rgb(color) + [0.5]
+            color = matplotlib_to_rgb(color) + (0.5,)
         self.color = color
         self.contact_poses = {}
         self.handle = None
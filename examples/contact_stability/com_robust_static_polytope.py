@@ -27,6 +27,13 @@ import IPython
 import pymanoid
 import sys
 
+from collections import OrderedDict
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # Python 2.7 without the futures backport
+    ThreadPoolExecutor = None
+
 try:
     import stabilipy
 except Exception:
@@ -34,13 +41,53 @@ except Exception:
     print("You can get it from: https://github.com/haudren/stabilipy\n")
     sys.exit(-1)
 
-from numpy import array, zeros
+from numpy import array, copyto, einsum, sqrt, subtract, zeros
 from pymanoid import Stance
 from pymanoid.gui import PointMassWrenchDrawer
 from pymanoid.gui import draw_polytope
-from pymanoid.misc import matplotlib_to_rgb, norm
+from pymanoid.misc import matplotlib_to_rgba
 from openravepy import matrixFromPose
 
+CORNER_SIGNS = array([
+    [+1., -1., -1., +1.],
+    [+1., +1., -1., -1.],
+    [0., 0., 0., 0.]])
+
+
+class CompletedFuture(object):
+
+    """
+    Future-like wrapper around a result that is already available.
+    """
+
+    def __init__(self, result):
+        self.value = result
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self.value
+
+
+class SerialExecutor(object):
+
+    """
+    Executor that runs submitted calls right away, used in place of a thread
+    pool when ``concurrent.futures`` is not available.
+    """
+
+    def submit(self, fn, *args):
+        return CompletedFuture(fn(*args))
+
+
+def _normalize_color(color):
+    if color is None:
+        return (0., 0.5, 0., 0.5)
+    if isinstance(color, str):
+        return matplotlib_to_rgba(color, alpha=0.5)
+    return color
+
 
 class SupportPolyhedronDrawer(pymanoid.Process):
 
@@ -56,86 +103,169 @@ class SupportPolyhedronDrawer(pymanoid.Process):
     method: string, optional
         Method to compute the static equilibrium polygon.
         Choices are cdd, qhull (default) and parma
+    update_period : integer, optional
+        Number of simulation ticks between two updates of the polyhedron.
+
+    Notes
+    -----
+    Polyhedron computations run in a background thread so that they don't
+    block the simulation loop. Their results are drawn from the simulation
+    thread, as OpenRAVE graphical handles are not thread-safe. The previous
+    polyhedron stays on screen until the next one is ready.
+
+    Without ``concurrent.futures`` (Python 2.7 without the ``futures``
+    backport), computations run synchronously in the simulation thread.
     """
 
-    def __init__(self, stance, z=0., color=None, method='qhull'):
-        if color is None:
-            color = (0., 0.5, 0., 0.5)
-        if type(color) is str:
-            color = matplotlib_to_rgb(color) + [0.5]
+    def __init__(self, stance, z=0., color=None, method='qhull',
+                 update_period=4):
         super(SupportPolyhedronDrawer, self).__init__()
-        self.color = color
-        self.contact_poses = {}
+        self.color = _normalize_color(color)
+        self.contacts = list(stance.contacts)
+        self.cur_poses = zeros((len(self.contacts), 7))
+        self.delta_poses = zeros((len(self.contacts), 7))
+        self.executor = ThreadPoolExecutor(max_workers=1) \
+            if ThreadPoolExecutor is not None else SerialExecutor()
         self.handle = None
+        self.hmatrix_cache = OrderedDict()
         self.max_iter = 50
         self.method = method
         self.nr_iter = 0
-        self.polyhedron = None
+        self.pending = None
+        self.polyhedron = stabilipy.StabilityPolygon(
+            robot.mass, dimension=3, radius=1.5)
+        self.polyhedron.select_solver(method)
+        self.pose_tolerance = 1e-6
         self.stance = stance
+        self.tick_count = 0
+        self.update_period = update_period
         self.z = z
         #
-        self.update_contacts()
+        self.read_contact_poses()
+        self.prev_poses = self.cur_poses.copy()
         self.create_polyhedron(self.stance.contacts)
 
     def clear(self):
         self.handle = None
 
     def on_tick(self, sim):
+        self.tick_count += 1
+        if self.tick_count % self.update_period:
+            return
+        if self.pending is not None:
+            if not self.pending.done():
+                return
+            vertices = self.pending.result()
+            self.pending = None
+            if vertices is not None:
+                self.handle = draw_polytope(vertices)
         if self.handle is None:
             self.create_polyhedron(self.stance.contacts)
             return
-        for contact in self.stance.contacts:
-            if norm(contact.pose - self.contact_poses[contact.name]) > 1e-10:
-                self.update_contacts()
-                self.create_polyhedron(self.stance.contacts)
-                return
+        self.read_contact_poses()
+        max_delta = self.compute_max_pose_delta()
+        if max_delta > self.pose_tolerance:
+            self.update_contacts()
+            self.create_polyhedron(self.stance.contacts)
+            return
+        # below tolerance, pose jitter keeps refining the current polyhedron
         if self.nr_iter < self.max_iter:
             self.refine_polyhedron()
             self.nr_iter += 1
 
+    def compute_max_pose_delta(self):
+        """
+        Compute the largest contact pose change since the last update.
+
+        Returns
+        -------
+        max_delta : scalar
+            Maximum Euclidean norm of the difference between current and
+            previous contact poses.
+        """
+        delta = subtract(self.cur_poses, self.prev_poses, out=self.delta_poses)
+        return sqrt(einsum('ij,ij->i', delta, delta).max())
+
+    def read_contact_poses(self):
+        for i, contact in enumerate(self.contacts):
+            self.cur_poses[i] = contact.pose
+
     def update_contacts(self):
-        for contact in self.stance.contacts:
-            self.contact_poses[contact.name] = contact.pose
+        copyto(self.prev_poses, self.cur_poses)
+
+    def get_hmatrix(self, contact):
+        """
+        Get the homogeneous transform of a contact, reusing the last ones
+        computed for contacts that did not move.
+
+        Parameters
+        ----------
+        contact : pymanoid.Contact
+            Contact to get the transform of.
+
+        Returns
+        -------
+        hmatrix : array, shape=(4, 4)
+            Transform from the contact frame to the world frame.
+        """
+        pose = contact.pose
+        key = (contact.name, pose.tobytes())
+        hmatrix = self.hmatrix_cache.pop(key, None)
+        if hmatrix is None:
+            hmatrix = matrixFromPose(pose)
+        self.hmatrix_cache[key] = hmatrix
+        while len(self.hmatrix_cache) > 2 * len(self.contacts):
+            self.hmatrix_cache.popitem(last=False)
+        return hmatrix
 
     def create_polyhedron(self, contacts):
-        self.handle = None
         self.nr_iter = 0
-        try:
-            self.polyhedron = stabilipy.StabilityPolygon(
-                robot.mass, dimension=3, radius=1.5)
-            stabilipy_contacts = []
-            for contact in contacts:
-                hmatrix = matrixFromPose(contact.pose)
-                X, Y = contact.shape
-                displacements = [array([[X, Y, 0]]).T,
-                                 array([[-X, Y, 0]]).T,
-                                 array([[-X, -Y, 0]]).T,
-                                 array([[X, -Y, 0]]).T]
-                for disp in displacements:
-                    stabilipy_contacts.append(
-                        stabilipy.Contact(
-                            contact.friction,
-                            hmatrix[:3, 3:] + hmatrix[:3, :3].dot(disp),
-                            hmatrix[:3, 2:3]))
-            self.polyhedron.contacts = stabilipy_contacts
-            self.polyhedron.select_solver(self.method)
-            self.polyhedron.make_problem()
-            self.polyhedron.init_algo()
-            self.polyhedron.build_polys()
-            vertices = self.polyhedron.polyhedron()
-            self.handle = draw_polytope(
-                [(x[0], x[1], x[2]) for x in vertices])
-        except Exception as e:
-            print("SupportPolyhedronDrawer: {}".format(e))
+        contacts = list(contacts)
+        stabilipy_contacts = [None] * (4 * len(contacts))
+        for i, contact in enumerate(contacts):
+            hmatrix = self.get_hmatrix(contact)
+            X, Y = contact.shape
+            displacements = CORNER_SIGNS * array([[X], [Y], [0.]])
+            corners = hmatrix[:3, 3:] + hmatrix[:3, :3].dot(displacements)
+            friction = contact.friction
+            normal = hmatrix[:3, 2:3]
+            for j in range(4):
+                stabilipy_contacts[4 * i + j] = stabilipy.Contact(
+                    friction, corners[:, j:j + 1], normal)
+        self.pending = self.executor.submit(
+            self.compute_vertices, stabilipy_contacts)
 
     def refine_polyhedron(self):
+        self.pending = self.executor.submit(self.compute_vertices)
+
+    def compute_vertices(self, stabilipy_contacts=None):
+        """
+        Build or refine the polyhedron, then return its vertices. This function
+        is called from the background thread.
+
+        Parameters
+        ----------
+        stabilipy_contacts : list of stabilipy.Contact, optional
+            New contacts to build the polyhedron from. When omitted, the
+            current polyhedron is refined by one more edge.
+
+        Returns
+        -------
+        vertices : array, shape=(N, 3)
+            Vertices of the polyhedron, or ``None`` if the computation failed.
+        """
         try:
-            self.polyhedron.next_edge()
-            vertices = self.polyhedron.polyhedron()
-            self.handle = draw_polytope(
-                [(x[0], x[1], x[2]) for x in vertices])
+            if stabilipy_contacts is not None:
+                self.polyhedron.contacts = stabilipy_contacts
+                self.polyhedron.make_problem()
+                self.polyhedron.init_algo()
+                self.polyhedron.build_polys()
+            else:
+                self.polyhedron.next_edge()
+            return array(self.polyhedron.polyhedron())[:, :3]
         except Exception as e:
             print("SupportPolyhedronDrawer: {}".format(e))
+            return None
 
     def update_z(self, z):
         self.z = z
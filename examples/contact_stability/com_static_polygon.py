@@ -28,9 +28,20 @@ import sys
 
 import pymanoid
 
+from numpy import array, column_stack, copyto, einsum, full, sqrt, subtract
+from numpy import zeros
+
 from pymanoid.gui import StaticEquilibriumWrenchDrawer
 from pymanoid.gui import draw_polygon
-from pymanoid.misc import norm
+from pymanoid.misc import matplotlib_to_rgba
+
+
+def _normalize_color(color):
+    if color is None:
+        return (0., 0.5, 0., 0.5)
+    if isinstance(color, str):
+        return matplotlib_to_rgba(color, alpha=0.5)
+    return color
 
 
 class SupportPolygonDrawer(pymanoid.Process):
@@ -42,61 +53,92 @@ class SupportPolygonDrawer(pymanoid.Process):
     ----------
     stance : pymanoid.Stance
         Contacts and COM position of the robot.
-    method : string
+    method : string, optional
         Method to compute the static equilibrium polygon. Choices are: 'bretl',
-        'cdd' and 'hull'.
-    z_polygon : scalar
+        'cdd' and 'hull' (default).
+    z_polygon : scalar, optional
         Height where to draw the CoM static-equilibrium polygon.
     color : tuple or string, optional
         Area color.
+    update_period : integer, optional
+        Number of simulation ticks between two updates of the polygon.
+
+    Notes
+    -----
+    The 'hull' method is the fastest choice for interactive use, as its cost
+    is output-sensitive while 'bretl' and 'cdd' perform a full polytope
+    projection at every contact motion.
     """
 
-    def __init__(self, stance, method, z_polygon, color='g'):
-        if color is None:
-            color = (0., 0.5, 0., 0.5)
-        if type(color) is str:
-            from pymanoid.misc import matplotlib_to_rgb
-            color = matplotlib_to_rgb(color) + [0.5]
+    def __init__(self, stance, method='hull', z_polygon=0., color='g',
+                 update_period=4):
         super(SupportPolygonDrawer, self).__init__()
-        self.color = color
-        self.contact_poses = {}
+        self.color = _normalize_color(color)
+        self.contacts = list(stance.contacts)
+        self.cur_poses = zeros((len(self.contacts), 7))
+        self.delta_poses = zeros((len(self.contacts), 7))
         self.handle = None
         self.method = method
         self.stance = stance
+        self.tick_count = 0
+        self.update_period = update_period
         self.z = z_polygon
+        self.z_column = zeros(0)
         #
-        self.update_contact_poses()
+        self.read_contact_poses()
+        self.prev_poses = self.cur_poses.copy()
         self.update_polygon()
 
     def clear(self):
         self.handle = None
 
     def on_tick(self, sim):
+        self.tick_count += 1
+        if self.tick_count % self.update_period:
+            return
         if self.handle is None:
             self.update_polygon()
-        for contact in self.stance.contacts:
-            if norm(contact.pose - self.contact_poses[contact.name]) > 1e-10:
-                self.update_contact_poses()
-                self.update_polygon()
-                break
+        self.read_contact_poses()
+        if self.compute_max_pose_delta() > 1e-10:
+            self.update_contact_poses()
+            self.update_polygon()
+
+    def compute_max_pose_delta(self):
+        """
+        Compute the largest contact pose change since the last update.
+
+        Returns
+        -------
+        max_delta : scalar
+            Maximum Euclidean norm of the difference between current and
+            previous contact poses.
+        """
+        delta = subtract(self.cur_poses, self.prev_poses, out=self.delta_poses)
+        return sqrt(einsum('ij,ij->i', delta, delta).max())
+
+    def read_contact_poses(self):
+        for i, contact in enumerate(self.contacts):
+            self.cur_poses[i] = contact.pose
 
     def update_contact_poses(self):
-        for contact in self.stance.contacts:
-            self.contact_poses[contact.name] = contact.pose
+        copyto(self.prev_poses, self.cur_poses)
 
     def update_polygon(self):
         self.handle = None
         try:
-            vertices = self.stance.compute_static_equilibrium_polygon(
-                method=self.method)
+            vertices = array(self.stance.compute_static_equilibrium_polygon(
+                method=self.method))
+            if len(vertices) != len(self.z_column):
+                self.z_column = full(len(vertices), self.z)
             self.handle = draw_polygon(
-                [(x[0], x[1], self.z) for x in vertices],
+                column_stack((vertices[:, 0], vertices[:, 1], self.z_column)),
                 normal=[0, 0, 1], color=self.color)
         except Exception as e:
             print("SupportPolygonDrawer: {}".format(e))
 
     def update_z(self, z):
         self.z = z
+        self.z_column = full(len(self.z_column), z)
         self.update_polygon()
 
 
@@ -57,7 +57,7 @@ class SupportAreaDrawer(pymanoid.Process):
         if color is None:
             color = (0., 0.5, 0., 0.5)
         if type(color) is str:
-            color = matplotlib_to_rgb(color) + [0.5]
+            color = matplotlib_to_rgb(color) + (0.5,)
         super(SupportAreaDrawer, self).__init__()
         self.color = color
         self.contact_poses = {}
@@ -28,6 +28,8 @@ import IPython
 
 import pymanoid
 
+from numpy import zeros
+
 from pymanoid import Contact, PointMass, Stance
 from pymanoid.gui import draw_polygon
 from pymanoid.gui import RobotWrenchDrawer
@@ -55,6 +57,8 @@ class SoftContact(pymanoid.Process):
         Position of the wall in the world frame.
     stiffness : scalar
         Stiffness of the elastic surface.
+    wrench : array, shape=(6,)
+        Contact wrench buffer, updated in place at every tick.
     """
 
     def __init__(self, contact, stiffness=2000.):
@@ -69,6 +73,7 @@ class SoftContact(pymanoid.Process):
         self.handle = draw_polygon(polygon, [0, 1, 0], color='k')
         self.init_y = y + 0.01
         self.stiffness = stiffness
+        self.wrench = zeros(6)
 
     def on_tick(self, sim):
         """
@@ -79,8 +84,9 @@ class SoftContact(pymanoid.Process):
         sim : Simulation
             Instance of the current simulation.
         """
-        F_z = max(0., self.stiffness * (self.init_y - self.contact.y))
-        self.contact.set_wrench([0., 0., F_z, 0., 0., 0.])
+        contact = self.contact
+        self.wrench[2] = max(0., self.stiffness * (self.init_y - contact.y))
+        contact.set_wrench(self.wrench)  # set_wrench does not keep a reference
 
 
 if __name__ == "__main__":
@@ -27,9 +27,12 @@ import IPython
 import pyclipper
 import time
 
-from numpy import arange, array, bmat, cross, dot, eye, hstack, zeros
-from numpy import cos, pi, sin
+from numpy import arange, array, cross, dot, empty, eye, fill_diagonal
+from numpy import hstack, zeros
+from numpy import cos, cumsum, pi, roll, sin, unique, vstack, where
 from numpy.random import random, seed
+from scipy.spatial import ConvexHull
+from scipy.spatial.qhull import QhullError
 from threading import Lock
 
 import pymanoid
@@ -43,11 +46,9 @@ from pymanoid.interp import interpolate_pose_linear, quat_slerp
 from pymanoid.misc import normalize
 from pymanoid.mpc import LinearPredictiveControl
 from pymanoid.pypoman import compute_polytope_halfspaces
-from pymanoid.pypoman import intersect_polygons
 from pymanoid.robots import JVRC1
 from pymanoid.sim import gravity
 from pymanoid.tasks import ContactTask, DOFTask, PoseTask, MinCAMTask
-from pymanoid.transformations import rotation_matrix_from_quat
 
 
 def generate_staircase(radius, angular_step, height, roughness, friction,
@@ -73,18 +74,27 @@ def generate_staircase(radius, angular_step, height, roughness, friction,
         Duration of single-support phases in [s].
     init_com_offset : array, optional
         Initial offset applied to first stance.
+
+    Notes
+    -----
+    Each stance is given the flags ``is_ds`` and ``is_ss``, the tangent
+    ``stance_foot_t`` of its stance foot and its COM target position
+    ``com_p``. Contacts and COM targets of the staircase don't move, so these
+    values are computed once here rather than at every FSM tick.
     """
     stances = []
     contact_shape = (0.12, 0.06)
     first_left_foot = None
     prev_right_foot = None
-    for theta in arange(0., 2 * pi, angular_step):
+    thetas = arange(0., 2 * pi, angular_step)
+    rpy_noise = roughness * (random((len(thetas), 2, 3)) - 0.5)
+    for (i, theta) in enumerate(thetas):
         left_foot = Contact(
             shape=contact_shape,
             pos=[radius * cos(theta),
                  radius * sin(theta),
                  radius + .5 * height * sin(theta)],
-            rpy=(roughness * (random(3) - 0.5) + [0, 0, theta + .5 * pi]),
+            rpy=(rpy_noise[i, 0] + [0, 0, theta + .5 * pi]),
             friction=friction)
         if first_left_foot is None:
             first_left_foot = left_foot
@@ -93,7 +103,7 @@ def generate_staircase(radius, angular_step, height, roughness, friction,
             pos=[1.2 * radius * cos(theta + .5 * angular_step),
                  1.2 * radius * sin(theta + .5 * angular_step),
                  radius + .5 * height * sin(theta + .5 * angular_step)],
-            rpy=(roughness * (random(3) - 0.5) + [0, 0, theta + .5 * pi]),
+            rpy=(rpy_noise[i, 1] + [0, 0, theta + .5 * pi]),
             friction=friction)
         if prev_right_foot is not None:
             com_target_pos = left_foot.p + [0., 0., JVRC1.leg_length]
@@ -139,6 +149,13 @@ def generate_staircase(radius, angular_step, height, roughness, friction,
     ssl_stance.compute_static_equilibrium_polygon()
     stances.append(dsl_stance)
     stances.append(ssl_stance)
+    for stance in stances:  # quantities read by the FSM at every tick
+        stance.is_ds = stance.label.startswith('DS')
+        stance.is_ss = stance.label.startswith('SS')
+        stance_foot = stance.left_foot if stance.label.endswith('L') else \
+            stance.right_foot
+        stance.stance_foot_t = stance_foot.t
+        stance.com_p = stance.com.p
     return stances
 
 
@@ -162,6 +179,9 @@ class SwingFoot(Box):
             X=0.12, Y=0.06, Z=self.THICKNESS, color=color, dZ=-self.THICKNESS)
         self.end_pose = None
         self.mid_pose = None
+        self.pose_buffer = zeros(7)
+        self.segment = None
+        self.segment_poses = None
         self.start_pose = None
         self.swing_height = swing_height
         #
@@ -179,12 +199,18 @@ class SwingFoot(Box):
             New end pose.
         """
         mid_pose = interpolate_pose_linear(start_pose, end_pose, .5)
-        mid_n = rotation_matrix_from_quat(mid_pose[:4])[0:3, 2]
+        w, x, y, z = mid_pose[:4]
+        # third column of the rotation matrix of the unit quaternion
+        mid_n = array([
+            2. * (x * z + w * y),
+            2. * (y * z - w * x),
+            1. - 2. * (x * x + y * y)])
         mid_pose[4:] += self.swing_height * mid_n
         self.set_pose(start_pose)
         self.start_pose = start_pose
         self.mid_pose = mid_pose
         self.end_pose = end_pose
+        self.segment = None
 
     def update_pose(self, s):
         """
@@ -197,17 +223,19 @@ class SwingFoot(Box):
         """
         if s >= 1.:
             return
-        elif s <= .5:
-            pose0 = self.start_pose
-            pose1 = self.mid_pose
-            y = 2. * s
-        else:  # .5 < x < 1
-            pose0 = self.mid_pose
-            pose1 = self.end_pose
-            y = 2. * s - 1.
-        pos = (1. - y) * pose0[4:] + y * pose1[4:]
-        quat = quat_slerp(pose0[:4], pose1[:4], y)
-        self.set_pose(hstack([quat, pos]))
+        segment = 0 if s <= .5 else 1
+        if segment != self.segment:
+            self.segment = segment
+            self.segment_poses = \
+                (self.start_pose, self.mid_pose) if segment == 0 else \
+                (self.mid_pose, self.end_pose)
+        pose0, pose1 = self.segment_poses
+        y = 2. * s - segment
+        pose = self.pose_buffer
+        pose[:4] = quat_slerp(pose0[:4], pose1[:4], y)
+        pose[4:] = pose0[4:]
+        pose[4:] += y * (pose1[4:] - pose0[4:])
+        self.set_pose(pose)
 
 
 class MultiContactWalkingFSM(pymanoid.Process):
@@ -218,7 +246,8 @@ class MultiContactWalkingFSM(pymanoid.Process):
     Parameters
     ----------
     stances : list of Stances
-        Consecutives stances traversed by the FSM.
+        Consecutives stances traversed by the FSM, as returned by
+        :func:`generate_staircase`.
     robot : Robot
         Controller robot.
     swing_height : scalar
@@ -239,43 +268,41 @@ class MultiContactWalkingFSM(pymanoid.Process):
         self.robot = robot
         self.stances = stances
         self.swing_foot = SwingFoot(swing_height)
-
-    @property
-    def next_stance(self):
-        next_stance_id = self.cur_stance_id + 1
-        if next_stance_id >= self.nb_stances:
-            next_stance_id = 0 if self.cycle else self.cur_stance_id
-        return self.stances[next_stance_id]
-
-    @property
-    def next_next_stance(self):
-        next_next_stance_id = self.cur_stance_id + 2
-        if next_next_stance_id >= self.nb_stances:
-            if self.cycle:
-                next_next_stance_id %= self.nb_stances
-            else:  # not self.cycle:
-                next_next_stance_id = self.nb_stances - 1
-        return self.stances[next_next_stance_id]
+        #
+        n = self.nb_stances
+        if cycle:
+            self.next_stance_ids = [(i + 1) % n for i in range(n)]
+            self.next_next_stance_ids = [(i + 2) % n for i in range(n)]
+        else:  # not cycle
+            self.next_stance_ids = [min(i + 1, n - 1) for i in range(n)]
+            self.next_next_stance_ids = [min(i + 2, n - 1) for i in range(n)]
+        self.update_next_stances()
+
+    def update_next_stances(self):
+        """
+        Update ``next_stance`` and ``next_next_stance`` after a change of the
+        current stance.
+        """
+        cur_id = self.cur_stance_id
+        self.next_stance = self.stances[self.next_stance_ids[cur_id]]
+        self.next_next_stance = self.stances[self.next_next_stance_ids[cur_id]]
 
     def get_preview_targets(self):
-        stance_foot = self.cur_stance.left_foot \
-            if self.cur_stance.label.endswith('L') else \
-            self.cur_stance.right_foot
-        if self.cur_stance.label.startswith('SS') \
-                and self.rem_time < 0.5 * self.cur_stance.duration:
+        cur_stance = self.cur_stance
+        if cur_stance.is_ss and self.rem_time < 0.5 * cur_stance.duration:
             horizon = self.rem_time \
                 + self.next_stance.duration \
                 + 0.5 * self.next_next_stance.duration
-            target_com = self.next_stance.com.p
-            target_comd = (target_com - self.cur_stance.com.p) / horizon
-        elif self.cur_stance.label.startswith('DS'):
+            target_com = self.next_stance.com_p
+            target_comd = (target_com - cur_stance.com_p) / horizon
+        elif cur_stance.is_ds:
             horizon = self.rem_time + 0.5 * self.next_stance.duration
-            target_com = self.cur_stance.com.p
-            target_comd = 0.4 * stance_foot.t
+            target_com = cur_stance.com_p
+            target_comd = 0.4 * cur_stance.stance_foot_t
         else:  # single support with plenty of time ahead
             horizon = self.rem_time
-            target_com = self.cur_stance.com.p
-            target_comd = 0.4 * stance_foot.t
+            target_com = cur_stance.com_p
+            target_comd = 0.4 * cur_stance.stance_foot_t
         return (self.rem_time, horizon, target_com, target_comd)
 
     def on_tick(self, sim):
@@ -296,12 +323,11 @@ class MultiContactWalkingFSM(pymanoid.Process):
             return dist_inside_sep > -0.15
 
         if self.rem_time > 0.:
-            if self.cur_stance.label.startswith('SS'):
+            if self.cur_stance.is_ss:
                 progress = 1. - self.rem_time / self.cur_stance.duration
                 self.swing_foot.update_pose(progress)
             self.rem_time -= sim.dt
-        elif (self.cur_stance.label.startswith('DS') and not
-              can_switch_to_ss()):
+        elif self.cur_stance.is_ds and not can_switch_to_ss():
             print("FSM: not ready for single-support yet...")
         elif self.cur_stance_id == self.nb_stances - 1 and not self.cycle:
             self.is_over = True
@@ -320,6 +346,7 @@ class MultiContactWalkingFSM(pymanoid.Process):
             # now that we have read swing foot poses, we update cur_stance
             self.cur_stance_id = (self.cur_stance_id + 1) % self.nb_stances
             self.cur_stance = self.stances[self.cur_stance_id]
+            self.update_next_stances()
             self.rem_time = self.cur_stance.duration
             self.update_robot_ik()
 
@@ -350,6 +377,111 @@ class MultiContactWalkingFSM(pymanoid.Process):
         self.robot.ik.add(right_foot_task)
 
 
+def intersect_convex_polygons(polygon1, polygon2):
+    """
+    Intersect two convex polygons.
+
+    Parameters
+    ----------
+    polygon1 : list of arrays
+        Vertices of the first polygon in counterclockwise order.
+    polygon2 : list of arrays
+        Vertices of the second polygon in counterclockwise order.
+
+    Returns
+    -------
+    vertices : list of arrays
+        Vertices of the intersection in counterclockwise order.
+
+    Notes
+    -----
+    This function clips the first polygon by each edge of the second one
+    following the Sutherland-Hodgman algorithm. Contrary to
+    :func:`pymanoid.pypoman.intersect_polygons`, it only applies to convex
+    polygons but works directly in floating-point arithmetic.
+    """
+    vertices = array(polygon1, dtype=float)
+    clip = array(polygon2, dtype=float)
+    for (c0, c1) in zip(clip, roll(clip, -1, axis=0)):
+        if len(vertices) == 0:
+            return []
+        edge = c1 - c0
+        dist = edge[0] * (vertices[:, 1] - c0[1]) \
+            - edge[1] * (vertices[:, 0] - c0[0])
+        next_vertices = roll(vertices, -1, axis=0)
+        next_dist = roll(dist, -1)
+        inside = dist >= 0.
+        crossing = inside != (next_dist >= 0.)
+        alpha = dist / where(crossing, dist - next_dist, 1.)
+        intersections = vertices + alpha[:, None] * (next_vertices - vertices)
+        candidates = hstack([vertices, intersections]).reshape((-1, 2))
+        mask = array([inside, crossing]).T.flatten()
+        vertices = candidates[mask]
+    return list(vertices)
+
+
+def compute_hull_halfspaces(vertices):
+    """
+    Compute the halfspace representation (H-rep) of a full-dimensional
+    polytope given by its vertices.
+
+    Parameters
+    ----------
+    vertices : list of arrays
+        List of polytope vertices.
+
+    Returns
+    -------
+    A : array
+        Matrix of halfspace representation.
+    b : array
+        Vector of halfspace representation.
+
+    Notes
+    -----
+    This function calls Qhull through :class:`scipy.spatial.ConvexHull`, which
+    is faster than the double-description method on the small polytopes
+    handled here. It falls back to
+    :func:`pymanoid.pypoman.compute_polytope_halfspaces` when Qhull fails,
+    e.g. on flat polytopes.
+    """
+    try:
+        hull = ConvexHull(vertices)
+    except QhullError:
+        return compute_polytope_halfspaces(vertices)
+    # coplanar simplices of a facet yield the same inequality
+    equations = unique(hull.equations.round(12), axis=0)
+    return equations[:, :-1], -equations[:, -1]
+
+
+def expand_reduced_pendular_cone(reduced_hull, zdd_max=None):
+    """
+    Expand the reduced 2D form of a pendular COM acceleration cone into the
+    vertices of the corresponding 3D cone.
+
+    Parameters
+    ----------
+    reduced_hull : list of arrays
+        Vertices of the reduced 2D form of the cone.
+    zdd_max : scalar, optional
+        Maximum vertical acceleration in the output cone.
+
+    Returns
+    -------
+    vertices : array, shape=(N + 1, 3)
+        Apex (gravity vector) followed by the vertices of the cone section at
+        vertical acceleration ``zdd_max``.
+    """
+    g = -gravity[2]  # gravity constant (positive)
+    zdd = +g if zdd_max is None else zdd_max
+    reduced_hull = array(reduced_hull, dtype=float).reshape((-1, 2))
+    vertices = empty((reduced_hull.shape[0] + 1, 3))
+    vertices[0] = gravity
+    vertices[1:, :2] = (g + zdd) * reduced_hull
+    vertices[1:, 2] = zdd
+    return vertices
+
+
 class COMTube(object):
 
     """
@@ -399,16 +531,13 @@ class COMTube(object):
         t -= dot(t, n) * n
         t = normalize(t)
         b = cross(n, t)
-        cross_section = [dx * t + dy * b for (dx, dy) in [
-            (+self.radius, +self.radius),
-            (+self.radius, -self.radius),
-            (-self.radius, +self.radius),
-            (-self.radius, -self.radius)]]
+        r = self.radius
+        cross_section = dot(
+            array([[+r, +r], [+r, -r], [-r, +r], [-r, -r]]), vstack([t, b]))
         tube_start = self.start_com - self.margin * n
         tube_end = self.target_com + self.margin * n
-        vertices = (
-            [tube_start + s for s in cross_section] +
-            [tube_end + s for s in cross_section])
+        vertices = vstack([
+            tube_start + cross_section, tube_end + cross_section])
         self.full_vrep = vertices
         if self.start_stance.label.startswith('SS'):
             if all(abs(self.start_stance.com.p - self.target_com) < 1e-3):
@@ -425,20 +554,12 @@ class COMTube(object):
     def compute_primal_hrep(self):
         """Compute halfspaces of the primal tube."""
         try:
-            self.full_hrep = (compute_polytope_halfspaces(self.full_vrep))
+            self.full_hrep = compute_hull_halfspaces(self.full_vrep)
         except RuntimeError as e:
             raise Exception("Could not compute primal hrep: %s" % str(e))
 
     def compute_dual_vrep(self):
         """Compute vertices of the dual cones."""
-        def expand_reduced_pendular_cone(reduced_hull, zdd_max=None):
-            g = -gravity[2]  # gravity constant (positive)
-            zdd = +g if zdd_max is None else zdd_max
-            vertices_at_zdd = [
-                array([a * (g + zdd), b * (g + zdd), zdd])
-                for (a, b) in reduced_hull]
-            return [gravity] + vertices_at_zdd
-
         if len(self.primal_vrep) == 1:
             dual_vertices = self.start_stance.compute_pendular_accel_cone(
                 com_vertices=self.primal_vrep[0])
@@ -456,7 +577,8 @@ class COMTube(object):
                 com_vertices=self.primal_vrep[0], reduced=True)
             ds_vertices_2d = self.next_stance.compute_pendular_accel_cone(
                 com_vertices=self.full_vrep, reduced=True)
-        ss_vertices_2d = intersect_polygons(ds_vertices_2d, ss_vertices_2d)
+        ss_vertices_2d = intersect_convex_polygons(
+            ds_vertices_2d, ss_vertices_2d)
         ds_cone = expand_reduced_pendular_cone(ds_vertices_2d)
         ss_cone = expand_reduced_pendular_cone(ss_vertices_2d)
         if ds_then_ss:
@@ -467,7 +589,7 @@ class COMTube(object):
     def compute_dual_hrep(self):
         """Compute halfspaces of the dual cones."""
         for (stance_id, cone_vertices) in enumerate(self.dual_vrep):
-            B, c = compute_polytope_halfspaces(cone_vertices)
+            B, c = compute_hull_halfspaces(cone_vertices)
             self.dual_hrep.append((B, c))
 
 
@@ -489,8 +611,22 @@ class COMTubePredictiveControl(pymanoid.Process):
         Discretization step of the preview window.
     tube_radius : scalar
         Tube radius in [m] for the L1 norm.
+
+    Notes
+    -----
+    The last preview tube is kept along with its stance index and its start and
+    target COM positions rounded to the millimeter. Its primal and dual
+    representations are only recomputed when one of these changes, e.g. not
+    while the COM stands still.
+
+    Initial and goal state vectors are preallocated and updated in place at
+    every tick, so that the ``X`` property of a previous ``preview_control``
+    should not be used once a new one has been computed.
     """
 
+    A_TEMPLATE = eye(6)
+    B_TEMPLATE = zeros((6, 3))
+
     def __init__(self, com, fsm, preview_buffer, nb_mpc_steps, tube_radius):
         super(COMTubePredictiveControl, self).__init__()
         self.com = com
@@ -499,9 +635,13 @@ class COMTubePredictiveControl(pymanoid.Process):
         self.nb_mpc_steps = nb_mpc_steps
         self.preview_buffer = preview_buffer
         self.preview_control = None
+        self.state_matrices = {}
         self.target_com = PointMass(fsm.cur_stance.com.p, 30., color='g')
         self.tube = None
+        self.tube_key = None
         self.tube_radius = tube_radius
+        self.x_goal = zeros(6)
+        self.x_init = zeros(6)
 
     def on_tick(self, sim):
         """
@@ -536,6 +676,10 @@ class COMTubePredictiveControl(pymanoid.Process):
     def compute_preview_tube(self):
         """Compute preview tube and store it in ``self.tube``."""
         cur_com, target_com = self.com.p, self.target_com.p
+        key = (self.fsm.cur_stance_id, tuple(cur_com.round(3)),
+               tuple(target_com.round(3)))
+        if key == self.tube_key:
+            return
         cur_stance = self.fsm.cur_stance
         next_stance = self.fsm.next_stance
         self.tube = COMTube(
@@ -553,6 +697,39 @@ class COMTubePredictiveControl(pymanoid.Process):
         sim.log_comp_time('tube_primal_hrep', t2 - t1)
         sim.log_comp_time('tube_dual_vrep', t3 - t2)
         sim.log_comp_time('tube_dual_hrep', t4 - t3)
+        self.tube_key = key
+
+    def get_state_matrices(self, dT):
+        """
+        Get state dynamics matrices of the COM double integrator.
+
+        Parameters
+        ----------
+        dT : scalar
+            Duration of an MPC step in [s].
+
+        Returns
+        -------
+        A : array, shape=(6, 6)
+            State transition matrix.
+        B : array, shape=(6, 3)
+            Control matrix.
+
+        Notes
+        -----
+        Matrices are cached by step duration rounded to the microsecond. Step
+        durations repeat from one stance to the next, as they only depend on
+        phase durations and the simulation timestep.
+        """
+        dT = round(dT, 6)
+        if dT not in self.state_matrices:
+            A = self.A_TEMPLATE.copy()
+            B = self.B_TEMPLATE.copy()
+            fill_diagonal(A[:3, 3:], dT)
+            fill_diagonal(B[:3], .5 * dT ** 2)
+            fill_diagonal(B[3:], dT)
+            self.state_matrices[dT] = (A, B)
+        return self.state_matrices[dT]
 
     def compute_preview_control(self, switch_time, horizon,
                                 state_constraints=False):
@@ -562,21 +739,22 @@ class COMTubePredictiveControl(pymanoid.Process):
         target_com = self.target_com.p
         target_comd = self.target_com.pd
         dT = horizon / self.nb_mpc_steps
-        eye3 = eye(3)
-        A = array(bmat([[eye3, dT * eye3], [zeros((3, 3)), eye3]]))
-        B = array(bmat([[.5 * dT ** 2 * eye3], [dT * eye3]]))
-        x_init = hstack([cur_com, cur_comd])
-        x_goal = hstack([target_com, target_comd])
+        A, B = self.get_state_matrices(dT)
+        x_init, x_goal = self.x_init, self.x_goal
+        x_init[:3] = cur_com
+        x_init[3:] = cur_comd
+        x_goal[:3] = target_com
+        x_goal[3:] = target_comd
         switch_step = int(switch_time / dT)
         C = [None] * self.nb_mpc_steps
-        D = [None] * self.nb_mpc_steps
-        e = [None] * self.nb_mpc_steps
         D1, e1 = self.tube.dual_hrep[0]
-        if 0 <= switch_step < self.nb_mpc_steps - 1:
+        nb_steps_1 = max(0, min(switch_step + 1, self.nb_mpc_steps))
+        D = [D1] * nb_steps_1
+        e = [e1] * nb_steps_1
+        if nb_steps_1 < self.nb_mpc_steps:
             D2, e2 = self.tube.dual_hrep[1]
-        for k in range(self.nb_mpc_steps):
-            D[k] = D1 if k <= switch_step else D2
-            e[k] = e1 if k <= switch_step else e2
+            D += [D2] * (self.nb_mpc_steps - nb_steps_1)
+            e += [e2] * (self.nb_mpc_steps - nb_steps_1)
         if state_constraints:
             E, f = self.tube.full_hrep  # E * com[k] <= f
             raise NotImplementedError("add state constraints to [CDe]_list")
@@ -608,6 +786,14 @@ class PreviewBuffer(pymanoid.Process):
         Dimension of preview control vectors.
     callback : function, optional
         Function to call with each new control `(u, dT)`.
+
+    Notes
+    -----
+    Writers (:func:`update_preview` and :func:`reset`) synchronize on a lock
+    and publish a versioned ``(version, U, dT)`` snapshot in one assignment.
+    The reader (:func:`get_next_control`) does not take the lock: it reads the
+    latest snapshot and restarts from the first control when its version
+    changes. This assumes a single reader, here the simulation thread.
     """
 
     def __init__(self, u_dim, callback=None):
@@ -615,6 +801,8 @@ class PreviewBuffer(pymanoid.Process):
         self._U = None
         self._dT = None
         self._default_control = (zeros(u_dim), 0.1)
+        self._preview = (0, None, None)
+        self._read_version = 0
         self.callback = callback
         self.cur_control = None
         self.cur_index = 0
@@ -644,10 +832,10 @@ class PreviewBuffer(pymanoid.Process):
         with self.lock:
             self._U = U
             self._dT = dT
-            self.cur_index = 0
             self.nb_steps = len(dT)
             self.rem_time = 0.
             self.switch_step = switch_step
+            self._preview = (self._preview[0] + 1, U, dT)
 
     def reset(self):
         """Reset preview buffer to its empty state."""
@@ -655,8 +843,8 @@ class PreviewBuffer(pymanoid.Process):
             self._U = None
             self._dT = None
             self.cur_control = None
-            self.cur_index = 0
             self.rem_time = 0.
+            self._preview = (self._preview[0] + 1, None, None)
 
     def get_next_control(self):
         """
@@ -667,16 +855,19 @@ class PreviewBuffer(pymanoid.Process):
         (u, dT) : array, scalar
             Next control in the preview window.
         """
-        with self.lock:
-            if self.is_empty:
-                return self._default_control
-            j = self.u_dim * self.cur_index
-            u = self._U[j:j + self.u_dim]
-            if u.shape[0] == 0:
-                return self._default_control
-            dT = self._dT[self.cur_index]
-            self.cur_index += 1
-            return (u, dT)
+        version, U, dT = self._preview
+        if version != self._read_version:
+            self._read_version = version
+            self.cur_index = 0
+        if U is None:
+            return self._default_control
+        j = self.u_dim * self.cur_index
+        u = U[j:j + self.u_dim]
+        if u.shape[0] == 0:
+            return self._default_control
+        dT = dT[self.cur_index]
+        self.cur_index += 1
+        return (u, dT)
 
     def on_tick(self, sim):
         """
@@ -719,32 +910,39 @@ class PreviewDrawer(pymanoid.Process):
         """
         if preview_buffer.is_empty:
             return
-        com_pre, comd_pre = com_target.p, com_target.pd
-        com_free, comd_free = com_target.p, com_target.pd
+        nb_steps = preview_buffer.nb_steps
+        com, comd = com_target.p, com_target.pd
+        comdd = preview_buffer._U[:3 * nb_steps].reshape((nb_steps, 3))
+        dT = array(preview_buffer._dT[:nb_steps]).reshape((nb_steps, 1))
+        delta_comd = comdd * dT
+        comd_pre = comd + cumsum(delta_comd, axis=0)
+        com_pre = com + cumsum((comd_pre - .5 * delta_comd) * dT, axis=0)
         self.handles = []
         self.handles.append(
-            draw_point(com_target.p, color='m', pointsize=0.007))
-        for preview_index in range(preview_buffer.nb_steps):
-            com_pre0 = com_pre
-            j = 3 * preview_index
-            comdd = preview_buffer._U[j:j + 3]
-            dT = preview_buffer._dT[preview_index]
-            com_pre = com_pre + comd_pre * dT + comdd * .5 * dT ** 2
-            comd_pre += comdd * dT
+            draw_point(com, color='m', pointsize=0.007))
+        com_pre0 = com
+        for preview_index in range(nb_steps):
             color = \
                 'b' if preview_index <= preview_buffer.switch_step \
                 else 'y'
             self.handles.append(
-                draw_point(com_pre, color=color, pointsize=0.005))
+                draw_point(com_pre[preview_index], color=color,
+                           pointsize=0.005))
             self.handles.append(
-                draw_line(com_pre0, com_pre, color=color, linewidth=3))
-            if self.draw_free_traj:
-                com_free0 = com_free
-                com_free = com_free + comd_free * dT
+                draw_line(com_pre0, com_pre[preview_index], color=color,
+                          linewidth=3))
+            com_pre0 = com_pre[preview_index]
+        if self.draw_free_traj:
+            com_free = com + comd * cumsum(dT, axis=0)
+            com_free0 = com
+            for preview_index in range(nb_steps):
                 self.handles.append(
-                    draw_point(com_free, color='g', pointsize=0.005))
+                    draw_point(com_free[preview_index], color='g',
+                               pointsize=0.005))
                 self.handles.append(
-                    draw_line(com_free0, com_free, color='g', linewidth=3))
+                    draw_line(com_free0, com_free[preview_index], color='g',
+                              linewidth=3))
+                com_free0 = com_free[preview_index]
 
 
 class TubeDrawer(pymanoid.Process):
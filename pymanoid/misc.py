@@ -17,8 +17,31 @@
 # You should have received a copy of the GNU General Public License along with
 # pymanoid. If not, see <http://www.gnu.org/licenses/>.
 
-from datetime import datetime
-from numpy import array, dot, sqrt, tensordot, zeros
+from math import modf, sqrt
+from numpy import arange, array, asarray, dot, empty, inf, matmul, power
+from os import environ
+from time import localtime, strftime, time
+
+# Logging verbosity: 0 for none, 1 for errors, 2 to add warnings and 3 (the
+# default) to add information messages
+try:
+    LOG_LEVEL = int(environ.get('PYMANOID_LOG', 3))
+except ValueError:
+    print("pymanoid: PYMANOID_LOG should be an integer from 0 to 3, got %r" %
+          environ['PYMANOID_LOG'])
+    LOG_LEVEL = 3
+
+_MATPLOTLIB_RGB = {
+    'b': (0., 0., 0.5),
+    'c': (0., 0.5, 0.5),
+    'g': (0., 0.5, 0.),
+    'k': (0., 0., 0.),
+    'm': (0.5, 0., 0.5),
+    'r': (0.5, 0., 0.),
+    'w': (1., 1., 1.),
+    'y': (0.5, 0.5, 0.)}
+
+_MATPLOTLIB_RGBA = {}
 
 
 class AvgStdEstimator(object):
@@ -26,18 +49,25 @@ class AvgStdEstimator(object):
     """
     Online estimator for the average and standard deviation of a time series of
     scalar values.
+
+    Notes
+    -----
+    Moments are updated by Welford's algorithm, which avoids the catastrophic
+    cancellation of the textbook formula :math:`E[x^2] - E[x]^2`.
     """
 
+    __slots__ = ('last_value', 'm2', 'mean', 'n', 'x_max', 'x_min')
+
     def __init__(self):
         self.reset()
 
     def reset(self):
         self.last_value = None
+        self.m2 = 0.
+        self.mean = 0.
         self.n = 0
-        self.x = 0.
-        self.x2 = 0.
-        self.x_max = None
-        self.x_min = None
+        self.x_max = -inf
+        self.x_min = +inf
 
     def add(self, x):
         """
@@ -50,11 +80,12 @@ class AvgStdEstimator(object):
         """
         self.last_value = x
         self.n += 1
-        self.x += x
-        self.x2 += x ** 2
-        if self.x_max is None or x > self.x_max:
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x > self.x_max:
             self.x_max = x
-        if self.x_min is None or x < self.x_min:
+        if x < self.x_min:
             self.x_min = x
 
     @property
@@ -64,7 +95,7 @@ class AvgStdEstimator(object):
         """
         if self.n < 1:
             return None
-        return self.x / self.n
+        return self.mean
 
     @property
     def std(self):
@@ -75,10 +106,11 @@ class AvgStdEstimator(object):
             return None
         elif self.n == 1:
             return 0.
-        unbiased = sqrt(self.n * 1. / (self.n - 1))
-        return unbiased * sqrt(self.x2 / self.n - self.avg ** 2)
+        return sqrt(self.m2 / (self.n - 1))
 
     def __str__(self):
+        if self.n < 1:
+            return "empty"
         return "%f +/- %f (max: %f, min: %f) over %d items" % (
             self.avg, self.std, self.x_max, self.x_min, self.n)
 
@@ -94,9 +126,14 @@ class NDPolynomial(object):
         Coefficients of the polynomial from weakest to strongest.
     """
 
+    __slots__ = ('coeffs', 'exponents', 'powers', 'shape', 'stacked_coeffs')
+
     def __init__(self, coeffs):
         self.coeffs = coeffs
+        self.exponents = arange(len(coeffs))
+        self.powers = empty(len(coeffs))
         self.shape = coeffs[0].shape
+        self.stacked_coeffs = array(coeffs).reshape((len(coeffs), -1))
 
     @property
     def degree(self):
@@ -118,12 +155,15 @@ class NDPolynomial(object):
         -------
         P(x) : array
             Value of the polynomial at this point.
+
+        Notes
+        -----
+        Coefficients are stacked at construction so that evaluation boils down
+        to a single dot product with the powers of `x`, which are written to a
+        preallocated buffer. The returned array is not shared between calls.
         """
-        value = zeros(self.shape)
-        for coeff in reversed(self.coeffs):
-            value *= x
-            value += coeff
-        return value
+        power(x, self.exponents, out=self.powers)
+        return dot(self.powers, self.stacked_coeffs).reshape(self.shape)
 
 
 class PointWrap(object):
@@ -135,11 +175,18 @@ class PointWrap(object):
     ----------
     p : list or array
         Point coordinates.
+
+    Notes
+    -----
+    Float arrays are wrapped without copy, so that later updates to `p` are
+    seen through the wrapper.
     """
 
+    __slots__ = ('p',)
+
     def __init__(self, p):
         assert len(p) == 3, "Argument is not a point"
-        self.p = array(p)
+        self.p = asarray(p, dtype=float)
 
 
 class PoseWrap(object):
@@ -151,11 +198,33 @@ class PoseWrap(object):
     ----------
     p : list or array
         Pose coordinates.
+
+    Notes
+    -----
+    Float arrays are wrapped without copy, so that later updates to `pose` are
+    seen through the wrapper.
     """
 
+    __slots__ = ('pose',)
+
     def __init__(self, pose):
         assert len(pose) == 7, "Argument is not a pose"
-        self.pose = array(pose)
+        self.pose = asarray(pose, dtype=float)
+
+
+def _timestamp():
+    """
+    Current local time with millisecond precision, for logging.
+
+    Returns
+    -------
+    now : str
+        Time string in the ``%Y-%m-%d %H:%M:%S,%f`` format, with milliseconds
+        in place of microseconds.
+    """
+    t = time()
+    return "%s,%03d" % (
+        strftime("%Y-%m-%d %H:%M:%S", localtime(t)), int(modf(t)[0] * 1000))
 
 
 def error(msg):
@@ -167,7 +236,9 @@ def error(msg):
     msg : str
         Error message.
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
+    if LOG_LEVEL < 1:
+        return
+    now = _timestamp()
     print("%c[0;%d;48m%s pymanoid [ERROR] %s%c[m" % (0x1B, 31, now, msg, 0x1B))
 
 
@@ -180,7 +251,9 @@ def info(msg):
     msg : str
         Information message.
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
+    if LOG_LEVEL < 3:
+        return
+    now = _timestamp()
     print("%c[0;%d;48m%s pymanoid [INFO] %s%c[m" % (0x1B, 32, now, msg, 0x1B))
 
 
@@ -198,18 +271,7 @@ def matplotlib_to_rgb(color):
     rgb : tuple
         Red-green-blue tuple with values between 0 and 1.
     """
-    acolor = [0., 0., 0.]
-    if color == 'k':
-        return acolor
-    if color == 'w':
-        return [1., 1., 1.]
-    if color in ['r', 'm', 'y', 'w']:
-        acolor[0] += 0.5
-    if color in ['g', 'y', 'c', 'w']:
-        acolor[1] += 0.5
-    if color in ['b', 'c', 'm', 'w']:
-        acolor[2] += 0.5
-    return acolor
+    return _MATPLOTLIB_RGB.get(color, (0., 0., 0.))
 
 
 def matplotlib_to_rgba(color, alpha=0.5):
@@ -227,8 +289,19 @@ def matplotlib_to_rgba(color, alpha=0.5):
     -------
     rgba : tuple
         Red-green-blue-alpha tuple with values between 0 and 1.
+
+    Notes
+    -----
+    Results are memoized by ``(color, alpha)``, as draw functions call this
+    function with a handful of distinct arguments.
     """
-    return matplotlib_to_rgb(color) + [alpha]
+    key = (color, alpha)
+    try:
+        return _MATPLOTLIB_RGBA[key]
+    except KeyError:
+        rgba = matplotlib_to_rgb(color) + (alpha,)
+        _MATPLOTLIB_RGBA[key] = rgba
+        return rgba
 
 
 def middot(M, T):
@@ -246,8 +319,13 @@ def middot(M, T):
     -------
     U : array, shape=(a, n, b)
         Dot product between `M` and `T`.
+
+    Notes
+    -----
+    Broadcasting in :func:`numpy.matmul` yields this product directly in
+    contiguous memory, while ``tensordot`` requires a transposed copy.
     """
-    return tensordot(M, T, axes=(1, 1)).transpose([1, 0, 2])
+    return matmul(M, T)
 
 
 def norm(v):
@@ -267,7 +345,8 @@ def norm(v):
     Notes
     -----
     This straightforward function is 2x faster than :func:`numpy.linalg.norm`
-    on my machine.
+    on my machine. Taking the square root with :func:`math.sqrt` rather than
+    :func:`numpy.sqrt` saves the ufunc overhead on the scalar squared norm.
     """
     return sqrt(dot(v, v))
 
@@ -294,7 +373,7 @@ def normalize(v):
 
 
 def plot_polygon(points, alpha=.4, color='g', linestyle='solid', fill=True,
-                 linewidth=None):
+                 linewidth=None, sort=True):
     """
     Plot a polygon in matplotlib.
 
@@ -312,15 +391,20 @@ def plot_polygon(points, alpha=.4, color='g', linestyle='solid', fill=True,
         When ``True``, fills the area inside the polygon.
     linewidth : scalar, optional
         Line width in matplotlib format.
+    sort : bool, optional
+        When ``True``, compute the convex hull of `points` to sort its
+        vertices. Set to ``False`` when `points` are already the vertices of a
+        convex polygon in boundary order.
     """
     from matplotlib.patches import Polygon
     from pylab import axis, gca
-    from scipy.spatial import ConvexHull
     if type(points) is list:
         points = array(points)
     ax = gca()
-    hull = ConvexHull(points)
-    points = points[hull.vertices, :]
+    if sort:
+        from scipy.spatial import ConvexHull
+        hull = ConvexHull(points)
+        points = points[hull.vertices, :]
     xmin1, xmax1, ymin1, ymax1 = axis()
     xmin2, ymin2 = 1.5 * points.min(axis=0)
     xmax2, ymax2 = 1.5 * points.max(axis=0)
@@ -341,5 +425,7 @@ def warn(msg):
     msg : str
         Warning message.
     """
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
+    if LOG_LEVEL < 2:
+        return
+    now = _timestamp()
     print("%c[0;%d;48m%s pymanoid [WARN] %s%c[m" % (0x1B, 33, now, msg, 0x1B))
@@ -17,13 +17,62 @@
 # You should have received a copy of the GNU General Public License along with
 # pymanoid. If not, see <http://www.gnu.org/licenses/>.
 
-from numpy import cosh, dot, sinh, sqrt
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
+import numpy
+
+from math import exp, sqrt
+from numpy import array, clip, copyto, dot, empty, eye, multiply, subtract
+from numpy import zeros
 
 from .body import Point
 from .gui import draw_line, draw_point
 from .misc import warn
 from .sim import Process, gravity
 
+_G_Z = float(gravity[2])  # gravity has no horizontal component
+
+
+def _integrate_batch(xp, p0, pd0, cop, lambda_, duration):
+    """
+    Batch integration of inverted pendulums with array module `xp`.
+
+    Parameters
+    ----------
+    xp : module
+        Array module, either ``numpy`` or ``cupy``.
+    p0 : (N, 3) array
+        Initial COM positions in the world frame.
+    pd0 : (N, 3) array
+        Initial COM velocities in the world frame.
+    cop : (N, 3) array
+        CoP locations in the world frame, constant over the integration.
+    lambda_ : (N,) array
+        Leg stiffness coefficients (positive).
+    duration : scalar
+        Duration of forward integration.
+
+    Returns
+    -------
+    p : (N, 3) array
+        COM positions after integration.
+    pd : (N, 3) array
+        COM velocities after integration.
+    """
+    omega = xp.sqrt(lambda_)
+    e = xp.exp(omega * duration)
+    inv_e = 1. / e
+    ch = (0.5 * (e + inv_e))[:, None]
+    sh = (0.5 * (e - inv_e))[:, None]
+    vrp = xp.array(cop, dtype=float)
+    vrp[:, 2] -= _G_Z / lambda_
+    p = p0 * ch + pd0 * (sh / omega[:, None]) - vrp * (ch - 1.)
+    pd = pd0 * ch + (omega[:, None] * sh) * (p0 - vrp)
+    return p, pd
+
 
 class InvertedPendulum(Process):
 
@@ -52,6 +101,12 @@ class InvertedPendulum(Process):
         Half-length of a side of the CoM cube handle, in [m].
     """
 
+    __slots__ = (
+        'clamp', 'color', 'com', 'contact', 'cop', 'cop_local_max',
+        'cop_local_min', 'fulcrum_handle', 'fulcrum_transform', 'handles',
+        'integration_coeffs', 'is_visible', 'lambda_', 'lambda_max',
+        'lambda_min', 'p_out', 'pd_out', 'vrp')
+
     def __init__(self, pos, vel, contact, lambda_min=1e-5, lambda_max=None,
                  clamp=True, visible=True, color='b', size=0.02):
         super(InvertedPendulum, self).__init__()
@@ -59,13 +114,19 @@ class InvertedPendulum(Process):
         self.clamp = clamp
         self.color = color
         self.com = com
-        self.contact = contact
         self.cop = contact.p
+        self.fulcrum_handle = None
+        self.fulcrum_transform = eye(4)
         self.handles = None
+        self.integration_coeffs = (None, None, None, None, None, None)
         self.is_visible = visible
-        self.lambda_ = -gravity[2] / (com.z - contact.z)
+        self.lambda_ = -_G_Z / (com.z - contact.z)
         self.lambda_max = lambda_max
         self.lambda_min = lambda_min
+        self.pd_out = empty(3)
+        self.p_out = empty(3)
+        self.vrp = empty(3)
+        self.set_contact(contact)
         if visible:
             self.show()
         else:  # not visible
@@ -84,10 +145,22 @@ class InvertedPendulum(Process):
             self.com.p, self.com.pd, self.contact, visible=visible)
 
     def draw(self):
-        """Draw inverted pendulum."""
-        fulcrum = draw_point(self.cop, pointsize=0.01, color=self.color)
+        """
+        Draw inverted pendulum.
+
+        Notes
+        -----
+        The fulcrum handle is created once and moved to the CoP by its
+        transform. The leg handle is recreated at each call, as graphical
+        handles only support rigid transforms while the leg changes length.
+        """
+        if self.fulcrum_handle is None:
+            self.fulcrum_handle = draw_point(
+                zeros(3), pointsize=0.01, color=self.color)
+        self.fulcrum_transform[:3, 3] = self.cop
+        self.fulcrum_handle.SetTransform(self.fulcrum_transform)
         leg = draw_line(self.com.p, self.cop, linewidth=4, color=self.color)
-        self.handles = [fulcrum, leg]
+        self.handles = [self.fulcrum_handle, leg]
 
     def hide(self):
         """Hide pendulum from the GUI."""
@@ -95,6 +168,8 @@ class InvertedPendulum(Process):
         if self.handles:
             for handle in self.handles:
                 handle.Close()
+        self.fulcrum_handle = None
+        self.handles = None
         self.is_visible = False
 
     def show(self):
@@ -113,6 +188,8 @@ class InvertedPendulum(Process):
             New contact where CoPs can be realized.
         """
         self.contact = contact
+        self.cop_local_max = array(contact.shape[:2]) - 1e-5
+        self.cop_local_min = -self.cop_local_max
 
     def set_cop(self, cop, clamp=None):
         """
@@ -127,16 +204,12 @@ class InvertedPendulum(Process):
             ``self.clamp``.
         """
         if (self.clamp if clamp is None else clamp):
-            cop_local = dot(self.contact.R.T, cop - self.contact.p)
-            if cop_local[0] >= self.contact.shape[0]:
-                cop_local[0] = self.contact.shape[0] - 1e-5
-            elif cop_local[0] <= -self.contact.shape[0]:
-                cop_local[0] = -self.contact.shape[0] + 1e-5
-            if cop_local[1] >= self.contact.shape[1]:
-                cop_local[1] = self.contact.shape[1] - 1e-5
-            elif cop_local[1] <= -self.contact.shape[1]:
-                cop_local[1] = -self.contact.shape[1] + 1e-5
-            cop = self.contact.p + dot(self.contact.R, cop_local)
+            R = self.contact.R
+            cop_local = dot(R.T, cop - self.contact.p)[:2]
+            delta = clip(cop_local, self.cop_local_min, self.cop_local_max)
+            delta -= cop_local
+            if delta.any():  # only go back to world frame if CoP was clamped
+                cop = cop + dot(R[:, :2], delta)
         elif __debug__:
             cop_check = dot(self.contact.R.T, cop - self.contact.p)
             if abs(cop_check[0]) > 1.05 * self.contact.shape[0]:
@@ -179,17 +252,116 @@ class InvertedPendulum(Process):
         ----------
         duration : scalar
             Duration of forward integration.
+
+        Notes
+        -----
+        Hyperbolic functions are evaluated on Python floats from a single
+        exponential, and results are written to preallocated buffers, as NumPy
+        dispatch dominates the computation time for such small vectors. Both
+        buffers are copied by ``set_pos()`` and ``set_vel()``.
+
+        Coefficients and the vertical VRP offset only depend on the stiffness
+        and duration, which are usually the same from one simulation tick to
+        the next. The last ones are kept in ``self.integration_coeffs`` so that
+        no transcendental function is evaluated while they are still valid.
+        They are checked against ``self.lambda_`` at each call, so that the
+        stiffness may also be assigned directly.
         """
-        omega = sqrt(self.lambda_)
+        coeffs = self.integration_coeffs
+        if coeffs[0] != self.lambda_ or coeffs[1] != duration:
+            omega = sqrt(self.lambda_)
+            e = exp(omega * duration)
+            inv_e = 1. / e
+            ch, sh = 0.5 * (e + inv_e), 0.5 * (e - inv_e)
+            coeffs = (
+                self.lambda_, duration, ch, sh / omega, omega * sh,
+                _G_Z / self.lambda_)
+            self.integration_coeffs = coeffs
+        _, _, ch, sh_over_omega, omega_sh, vrp_offset_z = coeffs
         p0 = self.com.p
         pd0 = self.com.pd
-        ch, sh = cosh(omega * duration), sinh(omega * duration)
-        vrp = self.cop - gravity / self.lambda_
-        p = p0 * ch + pd0 * sh / omega - vrp * (ch - 1.)
-        pd = pd0 * ch + omega * (p0 - vrp) * sh
+        vrp, p, pd = self.vrp, self.p_out, self.pd_out
+        copyto(vrp, self.cop)
+        vrp[2] -= vrp_offset_z
+        # p = p0 * ch + pd0 * sh / omega - vrp * (ch - 1.)
+        multiply(p0, ch, p)
+        p += sh_over_omega * pd0
+        p -= (ch - 1.) * vrp
+        # pd = pd0 * ch + omega * (p0 - vrp) * sh
+        subtract(p0, vrp, pd)
+        pd *= omega_sh
+        pd += ch * pd0
         self.com.set_pos(p)
         self.com.set_vel(pd)
 
+    @staticmethod
+    def integrate_batch(p0, pd0, cop, lambda_, duration):
+        """
+        Integrate the dynamics of several inverted pendulums at once.
+
+        Parameters
+        ----------
+        p0 : (N, 3) array
+            Initial COM positions in the world frame.
+        pd0 : (N, 3) array
+            Initial COM velocities in the world frame.
+        cop : (N, 3) array
+            CoP locations in the world frame, constant over the integration.
+        lambda_ : (N,) array
+            Leg stiffness coefficients (positive).
+        duration : scalar
+            Duration of forward integration.
+
+        Returns
+        -------
+        p : (N, 3) array
+            COM positions after integration.
+        pd : (N, 3) array
+            COM velocities after integration.
+
+        Notes
+        -----
+        This function applies the same formulas as :func:`integrate` to all
+        pendulums with one NumPy call per operation. Inputs are not
+        validated.
+        """
+        return _integrate_batch(numpy, p0, pd0, cop, lambda_, duration)
+
+    @staticmethod
+    def integrate_batch_gpu(p0, pd0, cop, lambda_, duration):
+        """
+        Integrate the dynamics of several inverted pendulums on the GPU.
+
+        Parameters
+        ----------
+        p0 : (N, 3) cupy.ndarray
+            Initial COM positions in the world frame.
+        pd0 : (N, 3) cupy.ndarray
+            Initial COM velocities in the world frame.
+        cop : (N, 3) cupy.ndarray
+            CoP locations in the world frame, constant over the integration.
+        lambda_ : (N,) cupy.ndarray
+            Leg stiffness coefficients (positive).
+        duration : scalar
+            Duration of forward integration.
+
+        Returns
+        -------
+        p : (N, 3) cupy.ndarray
+            COM positions after integration.
+        pd : (N, 3) cupy.ndarray
+            COM velocities after integration.
+
+        Notes
+        -----
+        This function requires `CuPy <https://cupy.dev/>`_. It only pays off
+        over :func:`integrate_batch` for large batches, typically more than
+        :math:`10^4` pendulums, as host-device transfers are left to the
+        caller.
+        """
+        assert cupy is not None, "CuPy is not installed"
+        return _integrate_batch(cupy, p0, pd0, cop, lambda_, duration)
+
     def on_tick(self, sim):
         """
         Integrate dynamics for one simulation step.